@@ -1,8 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, g
+from flask import Response, before_render_template, template_rendered
+from markupsafe import Markup
 import pandas as pd
 from werkzeug.utils import secure_filename
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+import click
+import csv
+import io
+import itertools
+import json
 import os
+import sys
+import threading
 import time   # để đo thời gian
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
 
 
 # =============================================================
@@ -17,6 +32,56 @@ class CustomerNode:
         self.right = None
 
 
+# =============================================================
+#  LAYOUT CÂY TÍNH SẴN (O(n)) → MẢNG PHẲNG LEVEL-ORDER
+#  x = thứ hạng in-order, y = độ sâu (layout của Knuth cho cây nhị phân):
+#  cha luôn nằm giữa 2 cây con, không node nào chồng nhau.
+#  Rộng hơn layout tidy (Reingold–Tilford): n node chiếm n vị trí, cây cân
+#  bằng vẽ kiểu tidy chỉ cần ~n/2. Đổi lại x giữ đúng thứ tự BST nên các
+#  cạnh cùng level không chồng nhau → canvas cắt khung nhìn bằng tìm nhị phân.
+#  Mỗi phần tử: [id, x, y, parent_index, name]
+# =============================================================
+def compute_layout(root):
+    if root is None:
+        return []
+
+    # In-order không đệ quy → thứ hạng x
+    rank = {}
+    stack = []
+    node = root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        rank[node] = len(rank)
+        node = node.right
+
+    # Duyệt từng level → level-order, kèm chỉ số của cha trong mảng kết quả
+    result = []
+    level = [(root, -1)]
+    depth = 0
+    while level:
+        next_level = []
+        for node, parent in level:
+            index = len(result)
+            result.append([node.id, rank[node], depth, parent, node.name])
+            if node.left:
+                next_level.append((node.left, index))
+            if node.right:
+                next_level.append((node.right, index))
+        level = next_level
+        depth += 1
+    return result
+
+
+def layout_json(nodes):
+    # JSON an toàn khi nhúng trực tiếp vào <script>
+    text = json.dumps({"nodes": nodes}, ensure_ascii=False, separators=(",", ":"))
+    text = text.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+    return Markup(text)
+
+
 # =============================================================
 #  CÂY BST CÂN BẰNG THEO REBUILD
 # =============================================================
@@ -24,6 +89,8 @@ class CustomerBST:
     def __init__(self):
         self.root = None
         self.auto_id = 1
+        self.version = 0          # tăng mỗi khi cây thay đổi
+        self._layout_cache = None
 
     # ---------------------------------------------------------
     # THÊM KHÁCH HÀNG – ID TỰ TĂNG + REBUILD CÂY CÂN BẰNG
@@ -55,12 +122,23 @@ class CustomerBST:
         return customer_id
 
     # ---------------------------------------------------------
-    # REBUILD LẠI BST THÀNH CÂY CÂN BẰNG
+    # THÊM NHIỀU KHÁCH HÀNG – CHỈ REBUILD 1 LẦN (NẠP DỮ LIỆU LỚN)
     # ---------------------------------------------------------
-    def rebuild_balanced(self):
-        nodes = self.to_list()  # inorder sorted
-        arr = [(n.id, n.name, n.phone) for n in nodes]
+    def insert_many(self, rows):
+        arr = [(n.id, n.name, n.phone) for n in self.to_list()]
+        ids = []
+        for name, phone in rows:
+            arr.append((self.auto_id, name, phone))
+            ids.append(self.auto_id)
+            self.auto_id += 1
+
+        self._build_balanced(arr)
+        return ids
 
+    # ---------------------------------------------------------
+    # DỰNG CÂY CÂN BẰNG TỪ MẢNG (id, name, phone) ĐÃ SẮP XẾP
+    # ---------------------------------------------------------
+    def _build_balanced(self, arr):
         def build(start, end):
             if start > end:
                 return None
@@ -72,6 +150,16 @@ class CustomerBST:
             return node
 
         self.root = build(0, len(arr) - 1)
+        self.version += 1
+
+    # ---------------------------------------------------------
+    # REBUILD LẠI BST THÀNH CÂY CÂN BẰNG
+    # ---------------------------------------------------------
+    def rebuild_balanced(self):
+        nodes = self.to_list()  # inorder sorted
+        arr = [(n.id, n.name, n.phone) for n in nodes]
+
+        self._build_balanced(arr)
 
         if arr:
             self.auto_id = arr[-1][0] + 1
@@ -146,6 +234,7 @@ class CustomerBST:
     # ---------------------------------------------------------
     def delete(self, customer_id):
         self.root = self._delete_recursive(self.root, customer_id)
+        self.version += 1
 
     def _delete_recursive(self, node, customer_id):
         if node is None:
@@ -206,6 +295,19 @@ class CustomerBST:
             "right": self.to_dict(node.right) if node.right else None
         }
 
+    # ---------------------------------------------------------
+    # LAYOUT PHẲNG ĐỂ VẼ CANVAS – CHỈ TÍNH LẠI KHI CÂY ĐỔI
+    # ---------------------------------------------------------
+    # Gọi khi giữ store_lock: compute_layout duyệt cây 2 lượt, cây đổi giữa
+    # chừng sẽ lệch thứ hạng. version đọc trước khi tính → không gắn layout cũ
+    # với version mới.
+    def to_layout_json(self):
+        version = self.version
+        if self._layout_cache is None or self._layout_cache[0] != version:
+            layout = layout_json(compute_layout(self.root)) if self.root else None
+            self._layout_cache = (version, layout)
+        return self._layout_cache[1]
+
     # ---------------------------------------------------------
     # TÌM THEO ID + TRẢ VỀ CHUỖI CÁC BƯỚC (CHO MÔ PHỎNG)
     # ---------------------------------------------------------
@@ -235,6 +337,8 @@ class CustomerAVL:
     def __init__(self):
         self.root = None
         self.auto_id = 1
+        self.version = 0
+        self._layout_cache = None
 
     class Node:
         def __init__(self, cid, name, phone):
@@ -278,6 +382,7 @@ class CustomerAVL:
         cid = self.auto_id
         self.auto_id += 1
         self.root = self._insert(self.root, cid, name, phone)
+        self.version += 1
         return cid
 
     def _insert(self, n, cid, name, phone):
@@ -315,6 +420,7 @@ class CustomerAVL:
     # ===== Delete =====
     def delete(self, cid):
         self.root = self._delete(self.root, cid)
+        self.version += 1
 
     def _min(self, n):
         while n.left:
@@ -385,6 +491,14 @@ class CustomerAVL:
             "right": self.to_dict(node.right) if node.right else None
         }
 
+    # ===== Layout phẳng cho canvas (cache theo version, gọi khi giữ store_lock) =====
+    def to_layout_json(self):
+        version = self.version
+        if self._layout_cache is None or self._layout_cache[0] != version:
+            layout = layout_json(compute_layout(self.root)) if self.root else None
+            self._layout_cache = (version, layout)
+        return self._layout_cache[1]
+
     # ===== TEXT VỊ TRÍ + SEARCH ĐỂ SO SÁNH THỜI GIAN =====
     def _position_descriptor(self, path):
         if not path:
@@ -456,6 +570,167 @@ class CustomerAVL:
         self._search_by_phone_recursive(node.right, phone, path + ["R"], result)
 
 
+# =============================================================
+#  CHỈ MỤC SỐ ĐIỆN THOẠI (TẬP CHÍNH XÁC phone → ids)
+#  Duy trì song song với 2 cây → kiểm tra trùng O(1) mỗi dòng,
+#  thay cho search_by_phone (duyệt cả cây, O(n) mỗi dòng)
+# =============================================================
+class PhoneIndex:
+    def __init__(self):
+        self.ids = {}  # phone → [customer_id, ...]
+
+    def add(self, phone, customer_id):
+        self.ids.setdefault(phone, []).append(customer_id)
+
+    def remove(self, phone, customer_id):
+        ids = self.ids.get(phone)
+        if not ids:
+            return
+        if customer_id in ids:
+            ids.remove(customer_id)
+        if not ids:
+            del self.ids[phone]
+
+    def lookup(self, phone):
+        ids = self.ids.get(phone)
+        return ids[0] if ids else None
+
+    def __contains__(self, phone):
+        return phone in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+
+# -------------------------------------------------------------
+# Lọc trùng số điện thoại cho 1 lô dữ liệu upload
+#   mode = "allow"  : chèn tất cả (như cũ)
+#          "skip"   : bỏ qua dòng trùng
+#          "reject" : từ chối cả file nếu có dòng trùng
+#          "merge"  : cập nhật tên cho khách hàng đã có số đó
+# Trả về (rows_to_insert, merges, duplicates)
+# -------------------------------------------------------------
+UPLOAD_MODES = ("skip", "reject", "merge", "allow")
+
+
+def dedupe_rows(rows, phone_index, mode="skip"):
+    to_insert = []
+    merges = []
+    duplicates = 0
+    seen = {}  # phone → vị trí trong to_insert (trùng ngay trong file)
+
+    for name, phone in rows:
+        existing = phone_index.lookup(phone)
+        if existing is None and phone not in seen:
+            seen[phone] = len(to_insert)
+            to_insert.append((name, phone))
+            continue
+
+        duplicates += 1
+        if mode == "allow":
+            to_insert.append((name, phone))
+        elif mode == "merge":
+            if existing is not None:
+                merges.append((existing, name))
+            else:
+                # Trùng trong chính file → dòng sau ghi đè tên dòng trước
+                to_insert[seen[phone]] = (name, phone)
+
+    return to_insert, merges, duplicates
+
+
+# =============================================================
+#  XUẤT DỮ LIỆU DẠNG STREAM (CSV / PARQUET) – BỘ NHỚ KHÔNG ĐỔI
+# =============================================================
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+EXPORT_TREES = ("bst", "avl")
+EXPORT_COLUMNS = ["customer_id", "name", "phone"]
+EXPORT_BATCH_SIZE = 65536   # số dòng mỗi lần ghi (= 1 row group của Parquet)
+
+
+def _collect_after(root, after_id, limit):
+    # Tối đa limit dòng có ID > after_id theo thứ tự ID: O(log n + limit)
+    stack = []
+    node = root
+    while node:
+        if node.id > after_id:
+            stack.append(node)
+            node = node.left
+        else:
+            node = node.right
+
+    batch = []
+    while stack and len(batch) < limit:
+        node = stack.pop()
+        batch.append((node.id, node.name, node.phone))
+        node = node.right
+        while node:
+            stack.append(node)
+            node = node.left
+    return batch
+
+
+def _batches(tree, batch_size, lock):
+    # Chỉ giữ khóa khi gom từng lô rồi nhả ra trước khi gửi cho client, lô
+    # sau đi tiếp từ ID cuối của lô trước → mỗi dòng xuất đúng 1 lần, theo
+    # thứ tự ID, và /add, /delete không phải chờ tốc độ đọc của client.
+    last_id = 0
+    while True:
+        with lock:
+            batch = _collect_after(tree.root, last_id, batch_size)
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1][0]
+
+
+def iter_csv(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_parquet(batches):
+    import pyarrow as pa          # phụ thuộc tùy chọn, chỉ cần khi xuất Parquet
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("customer_id", pa.int64()),
+        ("name", pa.string()),
+        ("phone", pa.string()),
+    ])
+    buf = io.BytesIO()
+    writer = pq.ParquetWriter(buf, schema)
+    for batch in batches:
+        ids, names, phones = zip(*batch)
+        writer.write_table(pa.table([ids, names, phones], schema=schema))
+        # Mỗi row group ghi xong → đẩy ra ngay, làm rỗng bộ đệm
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    writer.close()
+    yield buf.getvalue()
+
+
+def export_stream(tree, fmt, batch_size=EXPORT_BATCH_SIZE, lock=None):
+    batches = _batches(tree, batch_size, lock or nullcontext())
+    if fmt == "parquet":
+        return iter_parquet(batches)
+    return iter_csv(batches)
+
+
 # =============================================================
 # FLASK APP
 # =============================================================
@@ -466,8 +741,22 @@ UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+# Profiling theo yêu cầu: ?profile=1 / header "X-Profile: 1" (chỉ khi
+# PROFILE_ENABLED=1), hoặc lấy mẫu 1/N request (PROFILE_SAMPLE_EVERY=N, 0 = tắt)
+app.config["PROFILE_ENABLED"] = os.environ.get("PROFILE_ENABLED") == "1"
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", "profiles")
+app.config["PROFILE_SAMPLE_EVERY"] = int(os.environ.get("PROFILE_SAMPLE_EVERY", "0"))
+app.config["PROFILE_INTERVAL"] = float(os.environ.get("PROFILE_INTERVAL", "0.001"))
+
 customer_bst = CustomerBST()          # Balanced BST (rebuild)
 customer_bst_plain = CustomerAVL()    # AVL rotation
+phone_index = PhoneIndex()            # phone → ids, kiểm tra trùng O(1)
+
+# Khóa chung cho 2 cây + phone_index: app chạy đa luồng, ghi đồng thời sẽ
+# làm mất node khi rebuild, lệch auto_id giữa 2 cây...; route đọc duyệt cây
+# cũng phải giữ khóa vì AVL xoay node tại chỗ và insert_auto của BST gắn node
+# vào cây đang sống trước khi rebuild (duyệt giữa chừng → sót / lặp node).
+store_lock = threading.Lock()
 
 
 # =============================================================
@@ -484,19 +773,147 @@ def seed_data():
     ]
 
     for name, phone in data:
-        customer_bst.insert_auto(name, phone)
+        cid = customer_bst.insert_auto(name, phone)
         customer_bst_plain.insert_auto(name, phone)
+        phone_index.add(phone, cid)
 
 
 seed_data()
 
 
+# =============================================================
+# PROFILING – FLAME GRAPH + THỜI GIAN TỪNG PHA
+# =============================================================
+class StackSampler(threading.Thread):
+    """Luồng phụ lấy mẫu stack của luồng request → collapsed stacks."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+
+_profile_counter = itertools.count(1)
+
+
+def _profile_requested():
+    # Client chỉ bật được profiling khi server cho phép (tránh ghi file tràn đĩa)
+    if app.config["PROFILE_ENABLED"] and (
+        request.args.get("profile") == "1" or request.headers.get("X-Profile") == "1"
+    ):
+        return True
+    every = app.config["PROFILE_SAMPLE_EVERY"]
+    return every > 0 and next(_profile_counter) % every == 0
+
+
+@contextmanager
+def phase(name):
+    # Khi không profiling: chỉ 1 lần tra g → gần như không tốn chi phí
+    phases = g.get("profile_phases")
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+@app.before_request
+def _start_profile():
+    if not _profile_requested():
+        return
+    g.profile_phases = {}
+    g.profile_start = time.perf_counter()
+    g.profile_sampler = StackSampler(threading.get_ident(), app.config["PROFILE_INTERVAL"])
+    g.profile_sampler.start()
+
+
+@app.after_request
+def _finish_profile(response):
+    sampler = g.get("profile_sampler")
+    if sampler is None:
+        return response
+    sampler.stop()
+    total = (time.perf_counter() - g.profile_start) * 1000
+
+    os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+    name = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}-{request.endpoint}"
+    base = os.path.join(app.config["PROFILE_DIR"], name)
+
+    # Định dạng collapsed stack (flamegraph.pl / speedscope / inferno)
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "total_ms": round(total, 3),
+            "phases_ms": {k: round(v, 3) for k, v in g.profile_phases.items()},
+            "samples": sum(sampler.stacks.values()),
+            "interval_s": sampler.interval,
+        }, f, ensure_ascii=False, indent=2)
+
+    response.headers["X-Profile-Output"] = name
+    return response
+
+
+# Luôn dừng luồng lấy mẫu, kể cả khi route ném exception (after_request không chạy)
+@app.teardown_request
+def _stop_profile(exc):
+    sampler = g.pop("profile_sampler", None)
+    if sampler is not None:
+        sampler.stop()
+
+
+# Pha "render": đo qua signal của Flask → không phải sửa từng route
+def _before_render(sender, template, context, **extra):
+    if g.get("profile_phases") is not None:
+        g.profile_render_start = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    phases = g.get("profile_phases")
+    if phases is not None and "profile_render_start" in g:
+        elapsed = (time.perf_counter() - g.pop("profile_render_start")) * 1000
+        phases["render"] = phases.get("render", 0.0) + elapsed
+
+
+before_render_template.connect(_before_render, app)
+template_rendered.connect(_after_render, app)
+
+
 # =============================================================
 # ROUTES
 # =============================================================
 @app.route("/")
 def index():
-    customers = customer_bst.to_list()
+    with store_lock, phase("serialize"):
+        customers = customer_bst.to_list()
     return render_template(
         "index.html",
         customers=customers,
@@ -518,15 +935,19 @@ def add_customer():
         flash("Tên và số điện thoại không được để trống!", "error")
         return redirect(url_for("index"))
 
-    # BST
-    start_bst = time.time()
-    new_id = customer_bst.insert_auto(name, phone)
-    end_bst = time.time()
+    with store_lock:
+        with phase("insert"):
+            # BST
+            start_bst = time.time()
+            new_id = customer_bst.insert_auto(name, phone)
+            end_bst = time.time()
+
+            # AVL
+            start_avl = time.time()
+            customer_bst_plain.insert_auto(name, phone)
+            end_avl = time.time()
 
-    # AVL
-    start_avl = time.time()
-    customer_bst_plain.insert_auto(name, phone)
-    end_avl = time.time()
+            phone_index.add(phone, new_id)
 
     bst_time = (end_bst - start_bst) * 1000
     avl_time = (end_avl - start_avl) * 1000
@@ -543,20 +964,26 @@ def add_customer():
 # -------------------------------------------------------------
 @app.route("/delete/<int:customer_id>", methods=["POST"])
 def delete_customer(customer_id):
-    node, _ = customer_bst.search_by_id(customer_id)
-    if not node:
-        flash("Không tìm thấy khách hàng để xóa!", "error")
-        return redirect(url_for("index"))
+    with store_lock:
+        node, _ = customer_bst.search_by_id(customer_id)
+        if not node:
+            flash("Không tìm thấy khách hàng để xóa!", "error")
+            return redirect(url_for("index"))
+
+        phone = node.phone  # node có thể bị ghi đè khi xóa (thay bằng successor)
+
+        with phase("delete"):
+            # BST
+            start_bst = time.time()
+            customer_bst.delete(customer_id)
+            end_bst = time.time()
 
-    # BST
-    start_bst = time.time()
-    customer_bst.delete(customer_id)
-    end_bst = time.time()
+            # AVL
+            start_avl = time.time()
+            customer_bst_plain.delete(customer_id)
+            end_avl = time.time()
 
-    # AVL
-    start_avl = time.time()
-    customer_bst_plain.delete(customer_id)
-    end_avl = time.time()
+            phone_index.remove(phone, customer_id)
 
     bst_time = (end_bst - start_bst) * 1000
     avl_time = (end_avl - start_avl) * 1000
@@ -576,7 +1003,8 @@ def search_customer():
     search_type = request.form.get("search_type")
     query = request.form.get("query", "").strip()
 
-    customers = customer_bst.to_list()
+    with store_lock, phase("serialize"):
+        customers = customer_bst.to_list()
     results = []
 
     if not query:
@@ -591,61 +1019,62 @@ def search_customer():
 
     bst_time = avl_time = None
 
-    if search_type == "id":
-        try:
-            cid = int(query)
-        except ValueError:
-            flash("ID phải là số!", "error")
-            return redirect(url_for("index"))
-
-        # BST search
-        start_bst = time.time()
-        node, pos = customer_bst.search_by_id(cid)
-        end_bst = time.time()
-
-        # AVL search
-        start_avl = time.time()
-        node_avl, pos_avl = customer_bst_plain.search_by_id(cid)
-        end_avl = time.time()
-        bst_time = (end_bst - start_bst) * 1000000
-        avl_time = (end_avl - start_avl) * 1000000
-
-        if node:
-            results.append({"node": node, "position": pos})
-
-    elif search_type == "name":
-        # BST
-        start_bst = time.time()
-        bst_res = customer_bst.search_by_name(query)
-        end_bst = time.time()
-
-        # AVL
-        start_avl = time.time()
-        avl_res = customer_bst_plain.search_by_name(query)
-        end_avl = time.time()
-
-        bst_time = (end_bst - start_bst) * 1000000
-        avl_time = (end_avl - start_avl) * 1000000
-
-        for node, pos in bst_res:
-            results.append({"node": node, "position": pos})
-
-    elif search_type == "phone":
-        # BST
-        start_bst = time.time()
-        bst_res = customer_bst.search_by_phone(query)
-        end_bst = time.time()
-
-        # AVL
-        start_avl = time.time()
-        avl_res = customer_bst_plain.search_by_phone(query)
-        end_avl = time.time()
-
-        bst_time = (end_bst - start_bst) * 1000000
-        avl_time = (end_avl - start_avl) * 1000000
-
-        for node, pos in bst_res:
-            results.append({"node": node, "position": pos})
+    with store_lock:
+        if search_type == "id":
+            try:
+                cid = int(query)
+            except ValueError:
+                flash("ID phải là số!", "error")
+                return redirect(url_for("index"))
+
+            # BST search
+            start_bst = time.time()
+            node, pos = customer_bst.search_by_id(cid)
+            end_bst = time.time()
+
+            # AVL search
+            start_avl = time.time()
+            node_avl, pos_avl = customer_bst_plain.search_by_id(cid)
+            end_avl = time.time()
+            bst_time = (end_bst - start_bst) * 1000000
+            avl_time = (end_avl - start_avl) * 1000000
+
+            if node:
+                results.append({"node": node, "position": pos})
+
+        elif search_type == "name":
+            # BST
+            start_bst = time.time()
+            bst_res = customer_bst.search_by_name(query)
+            end_bst = time.time()
+
+            # AVL
+            start_avl = time.time()
+            avl_res = customer_bst_plain.search_by_name(query)
+            end_avl = time.time()
+
+            bst_time = (end_bst - start_bst) * 1000000
+            avl_time = (end_avl - start_avl) * 1000000
+
+            for node, pos in bst_res:
+                results.append({"node": node, "position": pos})
+
+        elif search_type == "phone":
+            # BST
+            start_bst = time.time()
+            bst_res = customer_bst.search_by_phone(query)
+            end_bst = time.time()
+
+            # AVL
+            start_avl = time.time()
+            avl_res = customer_bst_plain.search_by_phone(query)
+            end_avl = time.time()
+
+            bst_time = (end_bst - start_bst) * 1000000
+            avl_time = (end_avl - start_avl) * 1000000
+
+            for node, pos in bst_res:
+                results.append({"node": node, "position": pos})
 
     if not results:
         flash("Không tìm thấy khách hàng phù hợp!", "error")
@@ -668,7 +1097,8 @@ def search_customer():
 # -------------------------------------------------------------
 @app.route("/tree")
 def show_tree():
-    tree = customer_bst.to_dict()
+    with store_lock, phase("serialize"):
+        tree = customer_bst.to_layout_json()
     return render_template("tree.html", tree=tree, steps=None)
 
 
@@ -679,12 +1109,14 @@ def tree_search():
     except (TypeError, ValueError):
         cid = None
 
-    tree = customer_bst.to_dict()
+    with store_lock:
+        with phase("serialize"):
+            tree = customer_bst.to_layout_json()
+        if cid is not None:
+            node, steps = customer_bst.search_by_id_with_steps(cid)
 
     if cid is None:
         return render_template("tree.html", tree=tree, steps=["ID không hợp lệ!"])
-
-    node, steps = customer_bst.search_by_id_with_steps(cid)
     return render_template("tree.html", tree=tree, steps=steps)
 
 
@@ -694,15 +1126,23 @@ def tree_search():
 @app.route("/upload", methods=["POST"])
 def upload_file():
     file = request.files["file"]
+    mode = request.form.get("mode", "skip")
+    if mode not in UPLOAD_MODES:
+        mode = "skip"
+
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
     file.save(filepath)
 
-    if filename.endswith(".xlsx"):
-        df = pd.read_excel(filepath)
-    elif filename.endswith(".csv"):
-        df = pd.read_csv(filepath)
-    else:
+    # Đọc phone dạng chuỗi → giữ số 0 đầu (0905... ≠ 905...)
+    with phase("parse"):
+        if filename.endswith(".xlsx"):
+            df = pd.read_excel(filepath, dtype={"phone": str})
+        elif filename.endswith(".csv"):
+            df = pd.read_csv(filepath, dtype={"phone": str})
+        else:
+            df = None
+    if df is None:
         flash("Chỉ hỗ trợ file .xlsx hoặc .csv!", "error")
         return redirect(url_for("index"))
 
@@ -711,27 +1151,64 @@ def upload_file():
         flash("File phải có 2 cột: name, phone", "error")
         return redirect(url_for("index"))
 
-    # BST
-    start_bst = time.time()
-    count = 0
-    for _, row in df.iterrows():
-        name = str(row["name"])
-        phone = str(row["phone"])
-        customer_bst.insert_auto(name, phone)
-        count += 1
-    end_bst = time.time()
-    bst_time = (end_bst - start_bst) * 1000
+    # Bỏ dòng thiếu SĐT (NaN → astype(str) sẽ thành "nan" và bị coi là trùng)
+    phones = df["phone"].str.strip()
+    missing = phones.isna() | (phones == "")
+    blank = int(missing.sum())
+    df = df[~missing]
+    rows = zip(df["name"].astype(str), phones[~missing])
+
+    with store_lock:
+        # Lọc trùng SĐT (tập chính xác, O(1) mỗi dòng)
+        start_dedupe = time.time()
+        with phase("dedupe"):
+            rows, merges, duplicates = dedupe_rows(rows, phone_index, mode)
+        end_dedupe = time.time()
+        dedupe_time = (end_dedupe - start_dedupe) * 1000
+
+        if mode == "reject" and duplicates:
+            flash(f"Từ chối file: có {duplicates} số điện thoại bị trùng!", "error")
+            return redirect(url_for("index"))
 
-    # AVL
-    start_avl = time.time()
-    for _, row in df.iterrows():
-        name = str(row["name"])
-        phone = str(row["phone"])
-        customer_bst_plain.insert_auto(name, phone)
-    end_avl = time.time()
-    avl_time = (end_avl - start_avl) * 1000
+        with phase("insert"):
+            # Gộp: cập nhật tên cho khách hàng đã tồn tại
+            for cid, name in merges:
+                for tree in (customer_bst, customer_bst_plain):
+                    node, _ = tree.search_by_id(cid)
+                    if node:
+                        node.name = name
+                        tree.version += 1
+
+            # BST
+            start_bst = time.time()
+            new_ids = []
+            for name, phone in rows:
+                new_ids.append(customer_bst.insert_auto(name, phone))
+            end_bst = time.time()
+            bst_time = (end_bst - start_bst) * 1000
+            count = len(new_ids)
+
+            for (_, phone), cid in zip(rows, new_ids):
+                phone_index.add(phone, cid)
+
+            # AVL
+            start_avl = time.time()
+            for name, phone in rows:
+                customer_bst_plain.insert_auto(name, phone)
+            end_avl = time.time()
+            avl_time = (end_avl - start_avl) * 1000
 
     flash(f"Đã thêm {count} khách hàng từ file.", "success")
+    if duplicates:
+        if mode == "merge":
+            flash(f"Đã gộp {duplicates} dòng trùng số điện thoại.", "info")
+        elif mode == "allow":
+            flash(f"Có {duplicates} dòng trùng số điện thoại (vẫn thêm).", "info")
+        else:
+            flash(f"Đã bỏ qua {duplicates} dòng trùng số điện thoại.", "info")
+    if blank:
+        flash(f"Đã bỏ qua {blank} dòng không có số điện thoại.", "info")
+    flash(f"⏱ Kiểm tra trùng số điện thoại: {dedupe_time:.3f} ms", "info")
     flash(f"⏱ Upload + insert BST (rebuild): {bst_time:.3f} ms", "info")
     flash(f"⏱ Upload + insert AVL (rotation): {avl_time:.3f} ms", "info")
 
@@ -745,15 +1222,17 @@ def upload_file():
 def compare_trees():
     search_id = request.args.get("search_id", type=int)
 
-    avl_tree = customer_bst.to_dict()            # BST (balanced rebuild)
-    bst_tree = customer_bst_plain.to_dict()      # AVL (rotation)
-
     bst_steps = []
     avl_steps = []
 
-    if search_id is not None:
-        _, bst_steps = customer_bst.search_by_id_with_steps(search_id)
-        _, avl_steps = customer_bst_plain.search_by_id_with_steps(search_id)
+    with store_lock:
+        with phase("serialize"):
+            avl_tree = customer_bst.to_layout_json()        # BST (balanced rebuild)
+            bst_tree = customer_bst_plain.to_layout_json()  # AVL (rotation)
+
+        if search_id is not None:
+            _, bst_steps = customer_bst.search_by_id_with_steps(search_id)
+            _, avl_steps = customer_bst_plain.search_by_id_with_steps(search_id)
 
     return render_template(
         "avl.html",
@@ -764,6 +1243,78 @@ def compare_trees():
     )
 
 
+# -------------------------------------------------------------
+# EXPORT – stream khách hàng theo thứ tự ID (CSV / Parquet)
+# -------------------------------------------------------------
+def _export_tree(name):
+    return {"bst": customer_bst, "avl": customer_bst_plain}[name]
+
+
+def _parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@app.route("/export")
+def export_customers():
+    tree_name = request.args.get("tree", "bst")
+    fmt = request.args.get("format", "csv")
+    if tree_name not in EXPORT_TREES:
+        flash("Chỉ hỗ trợ xuất cây bst hoặc avl!", "error")
+        return redirect(url_for("index"))
+    if fmt not in EXPORT_FORMATS:
+        flash("Chỉ hỗ trợ xuất .csv hoặc .parquet!", "error")
+        return redirect(url_for("index"))
+    if fmt == "parquet" and not _parquet_available():
+        flash("Xuất Parquet cần cài thêm pyarrow!", "error")
+        return redirect(url_for("index"))
+
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    return Response(
+        export_stream(_export_tree(tree_name), fmt, lock=store_lock),
+        content_type=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=customers{ext}"},
+    )
+
+
+# Dữ liệu chỉ nằm trong RAM của server → CLI tải về qua /export của
+# server đang chạy (tiến trình "flask export" mới chỉ có dữ liệu seed)
+@app.cli.command("export")
+@click.option("--url", default="http://127.0.0.1:5000", show_default=True,
+              help="địa chỉ server đang chạy")
+@click.option("--tree", "tree_name", type=click.Choice(EXPORT_TREES), default="bst")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="csv")
+@click.argument("output", type=click.Path(dir_okay=False))
+def export_command(url, tree_name, fmt, output):
+    """Tải toàn bộ khách hàng (theo ID) từ server đang chạy ra file CSV / Parquet."""
+    query = urllib.parse.urlencode({"tree": tree_name, "format": fmt})
+    export_url = f"{url.rstrip('/')}/export?{query}"
+
+    start = time.time()
+    size = 0
+    try:
+        with urllib.request.urlopen(export_url) as response:
+            # Server lỗi (vd: thiếu pyarrow) sẽ redirect về trang chủ (HTML)
+            mimetype = EXPORT_FORMATS[fmt][0].split(";")[0]
+            if not response.headers.get("Content-Type", "").startswith(mimetype):
+                raise click.ClickException(f"Server không trả về file {fmt} (thiếu pyarrow?)")
+            with open(output, "wb") as f:
+                while True:
+                    chunk = response.read(1 << 20)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    size += len(chunk)
+    except urllib.error.URLError as e:
+        raise click.ClickException(f"Không kết nối được {url}: {e.reason}")
+
+    elapsed = time.time() - start
+    click.echo(f"Đã xuất {size:,} bytes ra {output} trong {elapsed:.3f} s")
+
+
 # =============================================================
 # RUN APP
 # =============================================================
@@ -0,0 +1,131 @@
+"""Đo tốc độ lọc trùng số điện thoại khi upload.
+
+    python bench_upload.py                  # 1.000.000 dòng, 30% trùng
+    python bench_upload.py --rows 200000 --dup 0.5 --insert
+    python bench_upload.py --upload 2000    # gọi thật route /upload
+
+Mặc định đây là benchmark phần lọc trùng (đọc file + dedupe_rows + chèn
+AVL), KHÔNG phải toàn bộ /upload: route /upload còn chèn vào cây BST,
+cây này rebuild lại toàn bộ sau mỗi dòng (O(n) mỗi dòng) nên với 1 triệu
+dòng sẽ không chạy xong. --insert đo thêm vòng chèn BST đó, --upload N
+gửi 1 file N dòng qua route /upload thật (Flask test client).
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from app import CustomerAVL, CustomerBST, PhoneIndex, dedupe_rows
+from fake_customers import random_name
+
+
+def make_csv(path, rows, dup_ratio, seed=42):
+    rng = random.Random(seed)
+    unique = int(rows * (1 - dup_ratio))
+    phones = rng.sample(range(10 ** 8, 10 ** 9), unique)
+    phones = ["0" + str(p) for p in phones]
+
+    data = []
+    for i in range(rows):
+        phone = phones[i] if i < unique else rng.choice(phones)
+        data.append((i + 1, random_name(rng), phone))
+    rng.shuffle(data)
+
+    pd.DataFrame(data, columns=["customer_id", "name", "phone"]).to_csv(path, index=False)
+    return rows - unique
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dup", type=float, default=0.3, help="tỉ lệ dòng trùng")
+    parser.add_argument("--mode", default="skip", choices=["skip", "merge", "allow"])
+    parser.add_argument("--insert", action="store_true", help="chèn cả vào cây BST (rebuild)")
+    parser.add_argument("--upload", type=int, default=0, metavar="N",
+                        help="đo route /upload thật với file N dòng")
+    args = parser.parse_args()
+
+    if args.upload:
+        bench_upload_route(args.upload, args.dup, args.mode)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        expected = make_csv(path, args.rows, args.dup)
+        print(f"Rows: {args.rows:,}  duplicates: {expected:,}  mode: {args.mode}")
+
+        start = time.perf_counter()
+        df = pd.read_csv(path, dtype={"phone": str})
+        parse_time = time.perf_counter() - start
+
+    index = PhoneIndex()
+    rows = zip(df["name"].astype(str), df["phone"].astype(str).str.strip())
+
+    start = time.perf_counter()
+    rows, merges, duplicates = dedupe_rows(rows, index, args.mode)
+    dedupe_time = time.perf_counter() - start
+
+    avl = CustomerAVL()
+    start = time.perf_counter()
+    for name, phone in rows:
+        cid = avl.insert_auto(name, phone)
+        index.add(phone, cid)
+    avl_time = time.perf_counter() - start
+
+    print(f"parse   : {parse_time * 1000:10.1f} ms")
+    print(f"dedupe  : {dedupe_time * 1000:10.1f} ms  "
+          f"({args.rows / dedupe_time:,.0f} rows/s, {duplicates:,} dropped)")
+    print(f"AVL     : {avl_time * 1000:10.1f} ms  ({len(rows):,} inserted)")
+
+    if args.insert:
+        bst = CustomerBST()
+        start = time.perf_counter()
+        for name, phone in rows:
+            bst.insert_auto(name, phone)
+        bst_time = time.perf_counter() - start
+        print(f"BST     : {bst_time * 1000:10.1f} ms  ({len(rows):,} inserted)")
+
+    # So sánh: kiểm tra trùng bằng search_by_phone (duyệt cả cây) cho 1 mẫu nhỏ
+    sample = [phone for _, phone in rows[:100]]
+    start = time.perf_counter()
+    for phone in sample:
+        avl.search_by_phone(phone)
+    walk_time = (time.perf_counter() - start) / max(len(sample), 1)
+    print(f"search_by_phone: {walk_time * 1e6:,.0f} µs/row vs PhoneIndex "
+          f"{dedupe_time / args.rows * 1e6:.2f} µs/row")
+
+
+def bench_upload_route(rows, dup_ratio, mode):
+    import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        expected = make_csv(path, rows, dup_ratio)
+        with open(path, "rb") as f:
+            content = f.read()
+
+    filename = "bench-upload.csv"
+    client = app.app.test_client()
+    print(f"/upload: {rows:,} rows  duplicates: {expected:,}  mode: {mode}")
+
+    start = time.perf_counter()
+    response = client.post(
+        "/upload",
+        data={"file": (io.BytesIO(content), filename), "mode": mode},
+        content_type="multipart/form-data",
+    )
+    elapsed = time.perf_counter() - start
+    os.remove(os.path.join(app.app.config["UPLOAD_FOLDER"], filename))
+
+    print(f"status  : {response.status_code}")
+    print(f"total   : {elapsed * 1000:10.1f} ms  ({rows / elapsed:,.0f} rows/s)")
+    print(f"stored  : {len(app.customer_bst.to_list()):,} BST / "
+          f"{len(app.customer_bst_plain.to_list()):,} AVL customers")
+
+
+if __name__ == "__main__":
+    main()
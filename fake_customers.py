@@ -0,0 +1,16 @@
+"""Sinh khách hàng giả lập theo dạng uploads/data_1000.csv.
+
+Không import app → dùng được ở tiến trình chạy tải mà không dựng Flask app.
+"""
+
+FIRST = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Vu", "Dang", "Bui"]
+MIDDLE = ["Van", "Thi", "Minh", "Bao", "Thanh", "Ngoc"]
+LAST = ["An", "Bich", "Hoang", "Trinh", "Lan", "Tuan", "Hai", "Linh"]
+
+
+def random_name(rng):
+    return f"{rng.choice(FIRST)} {rng.choice(MIDDLE)} {rng.choice(LAST)}"
+
+
+def random_phone(rng):
+    return "0" + str(rng.randrange(10 ** 8, 10 ** 9))
@@ -0,0 +1,293 @@
+"""Kiểm thử tải HTTP cho các route Flask của ứng dụng.
+
+    python loadtest.py                                  # 1k, 10k khách hàng
+    python loadtest.py --sizes 1000,100000 --clients 16 --duration 20
+    python loadtest.py --mix add=5,search_id=5,avl=1 --json report.json
+
+Với mỗi kích thước kho dữ liệu, script khởi động app ở tiến trình riêng
+(nạp sẵn N khách hàng giả lập theo dạng uploads/data_1000.csv), chạy
+nhiều client đồng thời theo tỉ lệ --mix rồi in thông lượng và độ trễ
+p50/p90/p99 cho từng route.
+
+Mọi route duyệt cây (ghi: /add, /delete, /upload; đọc: /search, /avl...)
+đều giữ store_lock của app, nên độ trễ đo được đã bao gồm thời gian chờ
+khóa khi nhiều client cùng truy cập. Cột err phải bằng 0: lỗi ở đây là
+lỗi của app (vd: 500), số liệu của lượt chạy có lỗi không dùng để so sánh.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import defaultdict
+
+from fake_customers import random_name, random_phone
+
+ROUTES = ["add", "delete", "search_id", "search_name", "search_phone", "upload", "avl"]
+UPLOAD_PREFIX = "loadtest-"   # file upload tạm, xóa sau mỗi lượt chạy
+DEFAULT_MIX = "add=20,delete=10,search_id=25,search_name=10,search_phone=10,upload=5,avl=20"
+
+
+# =============================================================
+#  CHẾ ĐỘ SERVER: NẠP SẴN DỮ LIỆU RỒI CHẠY APP
+# =============================================================
+def serve(size, port, seed):
+    import app
+
+    rng = random.Random(seed)
+    rows = [(random_name(rng), random_phone(rng)) for _ in range(size)]
+
+    # BST: rebuild 1 lần cho cả lô (insert_auto sẽ rebuild sau từng dòng)
+    ids = app.customer_bst.insert_many(rows)
+    for (name, phone), cid in zip(rows, ids):
+        app.customer_bst_plain.insert_auto(name, phone)
+        app.phone_index.add(phone, cid)
+
+    app.app.run(host="127.0.0.1", port=port, threaded=True, debug=False, use_reloader=False)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(size, seed, timeout=600):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve",
+         "--size", str(size), "--port", str(port), "--seed", str(seed)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    # Chờ server sẵn sàng (file tĩnh → không phụ thuộc kích thước cây)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server thoát sớm (mã {proc.returncode})")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/static/style.css")
+            conn.getresponse().read()
+            conn.close()
+            return proc, port
+        except OSError:
+            time.sleep(0.2)
+
+    proc.kill()
+    raise RuntimeError("Server không khởi động kịp")
+
+
+# =============================================================
+#  TẠO REQUEST CHO TỪNG ROUTE
+# =============================================================
+def _form(fields):
+    body = urllib.parse.urlencode(fields).encode("utf-8")
+    return body, {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def _multipart(fields, filename, content):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for key, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: text/csv\r\n\r\n{content}\r\n--{boundary}--\r\n"
+    )
+    return "".join(parts).encode("utf-8"), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+class RequestFactory:
+    def __init__(self, size, rng, upload_rows):
+        self.size = size
+        self.rng = rng
+        self.upload_rows = upload_rows
+
+    def _known_id(self):
+        return self.rng.randint(1, max(self.size, 1))
+
+    def build(self, route):
+        rng = self.rng
+        if route == "add":
+            body, headers = _form({"name": random_name(rng), "phone": random_phone(rng)})
+            return "POST", "/add", body, headers
+        if route == "delete":
+            return "POST", f"/delete/{self._known_id()}", b"", {}
+        if route == "search_id":
+            body, headers = _form({"search_type": "id", "query": self._known_id()})
+            return "POST", "/search", body, headers
+        if route == "search_name":
+            body, headers = _form({"search_type": "name", "query": random_name(rng)})
+            return "POST", "/search", body, headers
+        if route == "search_phone":
+            body, headers = _form({"search_type": "phone", "query": random_phone(rng)})
+            return "POST", "/search", body, headers
+        if route == "upload":
+            lines = ["customer_id,name,phone"]
+            for i in range(self.upload_rows):
+                lines.append(f"{i + 1},{random_name(rng)},{random_phone(rng)}")
+            filename = f"{UPLOAD_PREFIX}{uuid.uuid4().hex}.csv"
+            body, headers = _multipart({"mode": "skip"}, filename, "\n".join(lines))
+            return "POST", "/upload", body, headers
+        if route == "avl":
+            return "GET", f"/avl?search_id={self._known_id()}", None, {}
+        raise ValueError(route)
+
+
+# =============================================================
+#  CHẠY TẢI + THỐNG KÊ
+# =============================================================
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise SystemExit(f"Route không hợp lệ: {route} (chọn trong {', '.join(ROUTES)})")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def run_load(port, size, mix, clients, duration, upload_rows, seed):
+    routes = list(mix)
+    weights = [mix[r] for r in routes]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        factory = RequestFactory(size, rng, upload_rows)
+        local = defaultdict(list)
+        local_errors = defaultdict(int)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+
+        while time.perf_counter() < stop_at:
+            route = rng.choices(routes, weights)[0]
+            method, path, body, headers = factory.build(route)
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.getheader("Connection", "").lower() == "close" or response.version == 10:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if ok:
+                local[route].append(elapsed)
+            else:
+                local_errors[route] += 1
+
+        conn.close()
+        with lock:
+            for route, values in local.items():
+                latencies[route].extend(values)
+            for route, count in local_errors.items():
+                errors[route] += count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    report = {}
+    for route in routes:
+        values = sorted(latencies[route])
+        report[route] = {
+            "requests": len(values),
+            "errors": errors[route],
+            "rps": len(values) / wall,
+            "p50_ms": percentile(values, 50),
+            "p90_ms": percentile(values, 90),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] if values else 0.0,
+        }
+    return report, wall
+
+
+def cleanup_uploads():
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+    for name in os.listdir(folder):
+        if name.startswith(UPLOAD_PREFIX):
+            os.remove(os.path.join(folder, name))
+
+
+def print_report(size, report, wall, clients):
+    total = sum(r["requests"] for r in report.values())
+    print(f"\n=== {size:,} khách hàng · {clients} client · {wall:.1f} s · {total / wall:,.1f} req/s ===")
+    print(f"{'route':<14}{'req':>8}{'err':>6}{'req/s':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for route, r in report.items():
+        print(f"{route:<14}{r['requests']:>8}{r['errors']:>6}{r['rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}")
+    print("(độ trễ tính bằng ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000", help="các kích thước kho, cách nhau bởi dấu phẩy")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tỉ lệ route, vd: add=2,avl=1")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="số giây cho mỗi kích thước")
+    parser.add_argument("--upload-rows", type=int, default=100, help="số dòng mỗi file upload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    # Nội bộ: tiến trình con chạy server
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.size, args.port, args.seed)
+        return
+
+    mix = parse_mix(args.mix)
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Khởi động server với {size:,} khách hàng...", flush=True)
+        proc, port = start_server(size, args.seed)
+        try:
+            report, wall = run_load(port, size, mix, args.clients, args.duration,
+                                    args.upload_rows, args.seed)
+        finally:
+            proc.terminate()
+            proc.wait()
+            cleanup_uploads()
+        print_report(size, report, wall, args.clients)
+        results.append({"size": size, "clients": args.clients, "seconds": wall, "routes": report})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+// =============================================================
+//  VẼ CÂY LÊN CANVAS TỪ LAYOUT TÍNH SẴN Ở SERVER
+//  layout.nodes = [[id, x, y, parentIndex, name], ...] theo level-order
+//  x = thứ hạng in-order, y = độ sâu → mỗi level có x tăng dần
+// =============================================================
+(function () {
+    const DX = 90;          // khoảng cách ngang giữa 2 thứ hạng
+    const DY = 110;         // khoảng cách dọc giữa 2 level
+    const W = 76;           // kích thước node
+    const H = 52;
+
+    const COLOR = {
+        edge: "#0052CC",
+        border: "#0052CC",
+        fill: "#FFFFFF",
+        text: "#172B4D",
+        muted: "#5E6C84",
+        visitedFill: "#E3FCEF",
+        visitedBorder: "#36B37E",
+        foundFill: "#00875A",
+        foundText: "#FFFFFF",
+    };
+
+    function TreeCanvas(canvas, layout, options) {
+        options = options || {};
+        this.canvas = canvas;
+        this.ctx = canvas.getContext("2d");
+        this.nodes = layout.nodes || [];
+        this.visited = new Set(options.visited || []);
+        this.found = options.found == null ? null : options.found;
+        this.onZoom = options.onZoom || function () {};
+        this.scale = options.scale || 1;
+        this.minScale = 0.01;
+        this.maxScale = 2;
+        this.offsetX = 0;
+        this.offsetY = 0;
+
+        this._indexLevels();
+        this._bindEvents();
+        this.resize();
+        this.focus(this.found != null ? this.found : (this.nodes.length ? this.nodes[0][0] : null));
+    }
+
+    // Mỗi level là 1 đoạn liên tiếp trong mảng level-order
+    TreeCanvas.prototype._indexLevels = function () {
+        const starts = [];
+        this.byId = new Map();
+        for (let i = 0; i < this.nodes.length; i++) {
+            const y = this.nodes[i][2];
+            if (starts.length === y) starts.push(i);
+            this.byId.set(this.nodes[i][0], i);
+        }
+        starts.push(this.nodes.length);
+        this.levelStarts = starts;
+    };
+
+    TreeCanvas.prototype.resize = function () {
+        const ratio = window.devicePixelRatio || 1;
+        const rect = this.canvas.getBoundingClientRect();
+        this.width = rect.width;
+        this.height = rect.height;
+        this.canvas.width = Math.round(rect.width * ratio);
+        this.canvas.height = Math.round(rect.height * ratio);
+        this.ratio = ratio;
+        this.draw();
+    };
+
+    // Đưa node (theo id) lên giữa phía trên khung nhìn
+    TreeCanvas.prototype.focus = function (id) {
+        const i = id == null ? undefined : this.byId.get(id);
+        const n = i === undefined ? null : this.nodes[i];
+        const cx = n ? n[1] * DX : 0;
+        const cy = n ? n[2] * DY : 0;
+        this.offsetX = this.width / 2 - cx * this.scale;
+        this.offsetY = Math.min(60, this.height / 3 - cy * this.scale);
+        this.draw();
+    };
+
+    TreeCanvas.prototype.zoomAt = function (factor, px, py) {
+        const next = Math.max(this.minScale, Math.min(this.maxScale, this.scale * factor));
+        if (px === undefined) { px = this.width / 2; py = this.height / 2; }
+        // Giữ điểm dưới con trỏ đứng yên khi zoom
+        this.offsetX = px - (px - this.offsetX) * (next / this.scale);
+        this.offsetY = py - (py - this.offsetY) * (next / this.scale);
+        this.scale = next;
+        this.onZoom(this.scale);
+        this.draw();
+    };
+
+    TreeCanvas.prototype.reset = function () {
+        this.scale = 1;
+        this.onZoom(this.scale);
+        this.focus(this.found != null ? this.found : (this.nodes.length ? this.nodes[0][0] : null));
+    };
+
+    // Tìm phần tử đầu tiên trong [lo, hi) có key(i) >= value
+    function lowerBound(lo, hi, key, value) {
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (key(mid) < value) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    TreeCanvas.prototype.draw = function () {
+        const ctx = this.ctx;
+        const nodes = this.nodes;
+        const s = this.scale;
+
+        ctx.setTransform(this.ratio, 0, 0, this.ratio, 0, 0);
+        ctx.clearRect(0, 0, this.width, this.height);
+        if (!nodes.length) return;
+
+        // Khung nhìn trong hệ tọa độ cây (có lề bằng 1 node)
+        const vx0 = (-this.offsetX) / s - W;
+        const vx1 = (this.width - this.offsetX) / s + W;
+        const vy0 = (-this.offsetY) / s - H;
+        const vy1 = (this.height - this.offsetY) / s + H;
+
+        const detailed = s * W >= 24;   // đủ lớn để vẽ chữ
+        const visible = [];
+
+        ctx.setTransform(this.ratio * s, 0, 0, this.ratio * s, this.ratio * this.offsetX, this.ratio * this.offsetY);
+        ctx.lineWidth = Math.max(1 / s, 2);
+        ctx.strokeStyle = COLOR.edge;
+        ctx.beginPath();
+
+        const levels = this.levelStarts.length - 1;
+        for (let lv = 0; lv < levels; lv++) {
+            const y = lv * DY;
+            if (y - DY > vy1) break;
+            if (y < vy0) continue;
+
+            const lo = this.levelStarts[lv];
+            const hi = this.levelStarts[lv + 1];
+
+            // Cạnh (con → cha) trong cùng 1 level không chồng nhau và tăng dần theo x
+            const edgeMax = (i) => {
+                const p = nodes[i][3];
+                return (p < 0 ? nodes[i][1] : Math.max(nodes[i][1], nodes[p][1])) * DX;
+            };
+            for (let i = lowerBound(lo, hi, edgeMax, vx0); i < hi; i++) {
+                const n = nodes[i];
+                const p = n[3];
+                const x = n[1] * DX;
+                const minX = p < 0 ? x : Math.min(x, nodes[p][1] * DX);
+                if (minX > vx1) break;
+
+                if (p >= 0) {
+                    ctx.moveTo(x, y);
+                    ctx.lineTo(nodes[p][1] * DX, y - DY);
+                }
+                if (x >= vx0 && x <= vx1) visible.push(i);
+            }
+        }
+        ctx.stroke();
+
+        for (const i of visible) this._drawNode(nodes[i], detailed);
+    };
+
+    TreeCanvas.prototype._drawNode = function (n, detailed) {
+        const ctx = this.ctx;
+        const x = n[1] * DX;
+        const y = n[2] * DY;
+        const isFound = n[0] === this.found;
+        const isVisited = !isFound && this.visited.has(n[0]);
+
+        ctx.fillStyle = isFound ? COLOR.foundFill : isVisited ? COLOR.visitedFill : COLOR.fill;
+        ctx.strokeStyle = isFound ? COLOR.foundFill : isVisited ? COLOR.visitedBorder : COLOR.border;
+
+        if (!detailed) {
+            ctx.fillRect(x - W / 2, y - H / 2, W, H);
+            ctx.strokeRect(x - W / 2, y - H / 2, W, H);
+            return;
+        }
+
+        ctx.beginPath();
+        if (ctx.roundRect) ctx.roundRect(x - W / 2, y - H / 2, W, H, 8);
+        else ctx.rect(x - W / 2, y - H / 2, W, H);
+        ctx.fill();
+        ctx.stroke();
+
+        ctx.textAlign = "center";
+        ctx.textBaseline = "middle";
+        ctx.fillStyle = isFound ? COLOR.foundText : COLOR.text;
+        ctx.font = "bold 16px sans-serif";
+        ctx.fillText(String(n[0]), x, y - 8);
+        ctx.fillStyle = isFound ? COLOR.foundText : COLOR.muted;
+        ctx.font = "11px sans-serif";
+        ctx.fillText(n[4], x, y + 12, W - 8);
+    };
+
+    TreeCanvas.prototype._bindEvents = function () {
+        const canvas = this.canvas;
+        let dragging = null;
+
+        canvas.addEventListener("mousedown", (e) => {
+            dragging = { x: e.clientX, y: e.clientY };
+        });
+        window.addEventListener("mousemove", (e) => {
+            if (!dragging) return;
+            this.offsetX += e.clientX - dragging.x;
+            this.offsetY += e.clientY - dragging.y;
+            dragging = { x: e.clientX, y: e.clientY };
+            this.draw();
+        });
+        window.addEventListener("mouseup", () => { dragging = null; });
+
+        canvas.addEventListener("wheel", (e) => {
+            e.preventDefault();
+            const rect = canvas.getBoundingClientRect();
+            if (e.ctrlKey || e.metaKey) {
+                this.zoomAt(e.deltaY < 0 ? 1.15 : 1 / 1.15, e.clientX - rect.left, e.clientY - rect.top);
+            } else {
+                this.offsetX -= e.deltaX;
+                this.offsetY -= e.deltaY;
+                this.draw();
+            }
+        }, { passive: false });
+
+        window.addEventListener("resize", () => this.resize());
+    };
+
+    // Lấy danh sách ID đã duyệt từ các bước dạng "50 → Left" / "FOUND → 40"
+    TreeCanvas.parseSteps = function (steps) {
+        const visited = [];
+        let found = null;
+        (steps || []).forEach((step) => {
+            const ids = step.match(/\d+/g);
+            if (!ids) return;
+            ids.forEach((id) => visited.push(parseInt(id)));
+            if (step.startsWith("FOUND")) found = parseInt(ids[0]);
+        });
+        return { visited: visited, found: found };
+    };
+
+    window.TreeCanvas = TreeCanvas;
+})();
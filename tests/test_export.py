@@ -0,0 +1,64 @@
+import csv
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("flask")
+pytest.importorskip("pandas")
+
+import app  # noqa: E402
+
+
+def _tree(n):
+    tree = app.CustomerAVL()
+    for i in range(n):
+        tree.insert_auto(f"Khach {i}", f"09{i:08d}")
+    return tree
+
+
+def test_parquet_round_trip_multiple_row_groups():
+    pq = pytest.importorskip("pyarrow.parquet")
+    tree = _tree(10)
+
+    data = b"".join(app.export_stream(tree, "parquet", batch_size=3))
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+
+    assert parquet_file.num_row_groups == 4
+    table = parquet_file.read()
+    assert table.column("customer_id").to_pylist() == list(range(1, 11))
+    assert table.column("phone").to_pylist()[0] == "0900000000"
+
+
+def test_csv_round_trip_in_id_order():
+    tree = _tree(10)
+
+    data = b"".join(app.export_stream(tree, "csv", batch_size=3)).decode("utf-8")
+    rows = list(csv.reader(io.StringIO(data)))
+
+    assert rows[0] == app.EXPORT_COLUMNS
+    assert [int(r[0]) for r in rows[1:]] == list(range(1, 11))
+
+
+def test_write_proceeds_while_export_is_partly_read():
+    stream = app.export_stream(app.customer_bst, "csv", batch_size=2, lock=app.store_lock)
+    first = next(stream)
+    assert not app.store_lock.locked()
+
+    # /add chạy xong trong khi client xuất vẫn chưa đọc hết
+    client = app.app.test_client()
+    writer = threading.Thread(
+        target=client.post, args=("/add",), kwargs={"data": {"name": "Moi", "phone": "0912000111"}}
+    )
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+
+    data = (first + b"".join(stream)).decode("utf-8")
+    ids = [int(r[0]) for r in list(csv.reader(io.StringIO(data)))[1:]]
+    assert ids == sorted(set(ids))
+    assert ids[-1] == app.customer_bst.auto_id - 1